@@ -1,24 +1,61 @@
 import streamlit as st
-import base64
+import re
 import zlib
 import io
 
+try:
+    import pybase64 as _b64
+except ImportError:
+    import base64 as _b64
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+_B64_RE = re.compile(r'b"""([A-Za-z0-9+/=\n]+)"""')
+_ZLIB_MARK = ('zlib.decompress', '_z=zlib.decompress')
+_ZSTD_MARK = ('zstandard.ZstdDecompressor',)
+
+CODECS = {
+    "zlib": ("zlib", "zlib.decompress"),
+    "zstd": ("zstandard", "zstandard.ZstdDecompressor().decompress"),
+}
+
 def base64_encode(data: bytes) -> str:
-    return base64.b64encode(data).decode('utf-8')
+    return _b64.b64encode(data).decode('utf-8')
 
-def obfuscate_python_code(source_code: str, use_compression: bool = False, template: str = "standard") -> str:
-    source_bytes = source_code.encode('utf-8')
-    
+def compress_then_b64(src: bytes, level: int = 6, chunk_size: int = 65536, codec: str = "zlib") -> bytes:
+    if codec == "zstd":
+        co = zstd.ZstdCompressor(level=level).compressobj(size=len(src))
+    else:
+        co = zlib.compressobj(level, zlib.DEFLATED, 15, 9)
+    enc = _b64.b64encode
+    out = bytearray()
+    pending = b''
+    for i in range(0, len(src), chunk_size):
+        pending += co.compress(src[i:i + chunk_size])
+        cut = len(pending) - len(pending) % 3
+        if cut:
+            out += enc(pending[:cut])
+            pending = pending[cut:]
+    out += enc(pending + co.flush())
+    return bytes(out)
+
+def obfuscate_python_code(source_bytes: bytes, use_compression: bool = False, template: str = "standard", compression_level: int = 6, codec: str = "zlib", optimize: bool = False) -> tuple[str, int | None]:
+    compressed_size = None
+    mod, decompress = CODECS[codec]
+    run_open, run_close = ("compile(", ", '<obf>', 'exec', dont_inherit=True, optimize=2)") if optimize else ("", "")
     if use_compression:
-        compressed = zlib.compress(source_bytes, level=9)
-        b64 = base64_encode(compressed)
-        loader = f'''import base64, zlib
+        b64 = compress_then_b64(source_bytes, compression_level, codec=codec).decode('utf-8')
+        compressed_size = len(b64) * 3 // 4 - b64[-2:].count('=')
+        loader = f'''import base64, {mod}
 b = b"""{b64}"""
 try:
-    src = zlib.decompress(base64.b64decode(b))
+    src = {decompress}(base64.b64decode(b))
 except Exception:
     raise SystemExit('Decoding failed')
-exec(src, globals())
+exec({run_open}src{run_close}, globals())
 '''
     else:
         b64 = base64_encode(source_bytes)
@@ -28,44 +65,49 @@ try:
     src = base64.b64decode(b)
 except Exception:
     raise SystemExit('Decoding failed')
-exec(src, globals())
+exec({run_open}src{run_close}, globals())
 '''
     
     if template == "compact":
         if use_compression:
-            loader = f'''import base64,zlib;exec(zlib.decompress(base64.b64decode(b"""{b64}""")),globals())'''
+            loader = f'''import base64,{mod};exec({run_open}{decompress}(base64.b64decode(b"""{b64}""")){run_close},globals())'''
         else:
-            loader = f'''import base64;exec(base64.b64decode(b"""{b64}"""),globals())'''
+            loader = f'''import base64;exec({run_open}base64.b64decode(b"""{b64}"""){run_close},globals())'''
     elif template == "obfuscated":
         if use_compression:
-            loader = f'''import base64,zlib
+            loader = f'''import base64,{mod}
 _x=b"""{b64}"""
 _y=base64.b64decode
-_z=zlib.decompress
-exec(_z(_y(_x)),globals())
+_z={decompress}
+exec({run_open}_z(_y(_x)){run_close},globals())
 '''
         else:
             loader = f'''import base64
 _x=b"""{b64}"""
 _y=base64.b64decode
-exec(_y(_x),globals())
+exec({run_open}_y(_x){run_close},globals())
 '''
     
-    return loader
+    return loader, compressed_size
 
 def deobfuscate_python_code(obfuscated_code: str) -> str:
     try:
-        import re
-        b64_pattern = r'b"""([A-Za-z0-9+/=\n]+)"""'
-        match = re.search(b64_pattern, obfuscated_code)
+        match = _B64_RE.search(obfuscated_code)
         
         if not match:
             return "Error: Could not find Base64 encoded data in the file"
         
-        b64_data = match.group(1).replace('\n', '')
-        decoded = base64.b64decode(b64_data)
+        decoded = _b64.b64decode(match.group(1), validate=False)
         
-        if b'zlib.decompress' in obfuscated_code.encode() or b'_z=zlib.decompress' in obfuscated_code.encode():
+        if any(mark in obfuscated_code for mark in _ZSTD_MARK):
+            if zstd is None:
+                return "Error: This file uses zstd compression; install the 'zstandard' package to deobfuscate it"
+            try:
+                decompressed = zstd.ZstdDecompressor().decompress(decoded)
+                return decompressed.decode('utf-8')
+            except:
+                pass
+        elif any(mark in obfuscated_code for mark in _ZLIB_MARK):
             try:
                 decompressed = zlib.decompress(decoded)
                 return decompressed.decode('utf-8')
@@ -76,6 +118,16 @@ def deobfuscate_python_code(obfuscated_code: str) -> str:
     except Exception as e:
         return f"Error during deobfuscation: {str(e)}"
 
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_obfuscate(source_bytes: bytes, use_compression: bool, template: str, compression_level: int, codec: str, optimize: bool) -> tuple[str, bytes, int | None]:
+    loader, compressed_size = obfuscate_python_code(source_bytes, use_compression, template, compression_level, codec, optimize)
+    return loader, loader.encode('ascii'), compressed_size
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_deobfuscate(obfuscated_code: str) -> tuple[str, bytes]:
+    deobfuscated = deobfuscate_python_code(obfuscated_code)
+    return deobfuscated, deobfuscated.encode('utf-8')
+
 st.set_page_config(
     page_title="Python Code Obfuscator",
     page_icon="🔒",
@@ -97,7 +149,22 @@ with tab1:
         use_compression = st.checkbox(
             "Enable Compression",
             value=False,
-            help="Use zlib compression to reduce file size before encoding"
+            help="Compress the source to reduce file size before encoding"
+        )
+        
+        codec_option = st.selectbox(
+            "Compression Codec",
+            options=list(CODECS) if zstd is not None else ["zlib"],
+            disabled=not use_compression,
+            help="zstd decompresses faster but the obfuscated file then needs the 'zstandard' package to run"
+        )
+        
+        compression_level = st.select_slider(
+            "Compression Level",
+            options=[1, 6, 9],
+            value=6,
+            disabled=not use_compression,
+            help="1 is fastest, 9 gives the smallest output; 6 is a good balance for source code"
         )
         
         template_option = st.selectbox(
@@ -112,6 +179,12 @@ with tab1:
             "obfuscated": "Uses variable name obfuscation"
         }
         st.caption(f"ℹ️ {template_descriptions[template_option]}")
+        
+        optimize_bytecode = st.checkbox(
+            "Optimize Bytecode",
+            value=False,
+            help="Compile the decoded source with optimize=2: faster startup, but docstrings and assert statements are stripped"
+        )
     
     with col_left:
         uploaded_files = st.file_uploader(
@@ -126,15 +199,15 @@ with tab1:
         
         for idx, uploaded_file in enumerate(uploaded_files):
             with st.expander(f"📄 {uploaded_file.name}", expanded=len(uploaded_files) == 1):
-                source_code = uploaded_file.read().decode('utf-8')
-                original_size = len(source_code)
+                source_bytes = uploaded_file.getvalue()
+                original_size = len(source_bytes)
                 
                 st.success(f"✓ Loaded: {original_size} bytes")
                 
                 with st.expander("View Original Code", expanded=False):
-                    st.code(source_code, language='python', line_numbers=True)
+                    st.code(source_bytes.decode('utf-8'), language='python', line_numbers=True)
                 
-                obfuscated_code = obfuscate_python_code(source_code, use_compression, template_option)
+                obfuscated_code, obfuscated_bytes, compressed_size = _cached_obfuscate(source_bytes, use_compression, template_option, compression_level, codec_option, optimize_bytecode)
                 obfuscated_size = len(obfuscated_code)
                 
                 col1, col2, col3, col4 = st.columns(4)
@@ -146,8 +219,7 @@ with tab1:
                     size_change = ((obfuscated_size - original_size) / original_size) * 100
                     st.metric("Size Change", f"{size_change:+.1f}%")
                 with col4:
-                    if use_compression:
-                        compressed_size = len(zlib.compress(source_code.encode('utf-8'), level=9))
+                    if compressed_size is not None:
                         compression_ratio = (1 - compressed_size / original_size) * 100
                         st.metric("Compression", f"{compression_ratio:.1f}%")
                     else:
@@ -160,9 +232,9 @@ with tab1:
                 
                 st.download_button(
                     label=f"⬇️ Download {output_filename}",
-                    data=obfuscated_code,
+                    data=obfuscated_bytes,
                     file_name=output_filename,
-                    mime="text/x-python",
+                    mime="application/octet-stream",
                     key=f"download_{idx}",
                     use_container_width=True
                 )
@@ -178,7 +250,7 @@ with tab1:
             This tool obfuscates Python code using Base64 encoding:
             
             1. **Upload**: Select one or more Python (.py) files
-            2. **Compress** (optional): Apply zlib compression to reduce size
+            2. **Compress** (optional): Apply zlib or zstd compression to reduce size
             3. **Encode**: Convert to Base64 encoding
             4. **Wrap**: Add a Python loader template that decodes and executes
             5. **Download**: Get your obfuscated files
@@ -188,6 +260,10 @@ with tab1:
             - **Compact**: Minimal single-line loader
             - **Obfuscated**: Uses obscure variable names for extra obfuscation
             
+            **Optimize Bytecode** compiles the decoded code with `optimize=2`, which removes docstrings and `assert` statements.
+            
+            **Note**: Files compressed with zstd need `pip install zstandard` wherever they are run.
+            
             **Note**: This provides basic obfuscation, not encryption or strong security.
             """)
 
@@ -203,14 +279,14 @@ with tab2:
     )
     
     if deobf_file:
-        obfuscated_content = deobf_file.read().decode('utf-8')
+        obfuscated_content = deobf_file.getvalue().decode('utf-8')
         
         st.success(f"✓ Loaded: {deobf_file.name}")
         
         with st.expander("View Obfuscated Code", expanded=False):
             st.code(obfuscated_content, language='python', line_numbers=True)
         
-        deobfuscated = deobfuscate_python_code(obfuscated_content)
+        deobfuscated, deobfuscated_bytes = _cached_deobfuscate(obfuscated_content)
         
         if deobfuscated.startswith("Error"):
             st.error(deobfuscated)
@@ -232,9 +308,9 @@ with tab2:
             
             st.download_button(
                 label="⬇️ Download Deobfuscated File",
-                data=deobfuscated,
+                data=deobfuscated_bytes,
                 file_name=output_filename,
-                mime="text/x-python",
+                mime="application/octet-stream",
                 use_container_width=True
             )
     else:
@@ -246,14 +322,14 @@ with tab2:
             
             1. **Upload**: Select an obfuscated Python file
             2. **Extract**: Find the Base64 encoded data
-            3. **Decompress** (if applicable): Apply zlib decompression
+            3. **Decompress** (if applicable): Apply zlib or zstd decompression
             4. **Decode**: Convert from Base64 back to original code
             5. **Download**: Get your recovered source code
             
             **Supported formats:**
             - Files obfuscated with this tool
             - Files with standard Base64 encoding
-            - Files with compression + Base64 encoding
+            - Files with zlib or zstd compression + Base64 encoding
             """)
 
 st.markdown("---")